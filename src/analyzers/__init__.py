@@ -0,0 +1,3 @@
+from .html_analyzer import HTMLAnalyzer
+
+__all__ = ["HTMLAnalyzer"]
@@ -0,0 +1,308 @@
+import asyncio
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import orjson
+import tiktoken
+from langchain.prompts import PromptTemplate
+from langchain_community.callbacks.manager import get_openai_callback
+from langchain_core.runnables import RunnableSequence
+from langchain_xai import ChatXAI
+
+from cache import EmbeddingCache, LLMCache
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str) -> Optional[tiktoken.Encoding]:
+    """
+    Return the tiktoken encoding for model_name, falling back to cl100k_base.
+
+    Returns None if the encoding cannot be loaded (tiktoken downloads it on first use),
+    so callers fall back to byte counts; the failure is cached and logged only once.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, using byte counts instead of tokens: {e}")
+        return None
+
+
+def _split_evenly(total: int, parts: int) -> List[int]:
+    base, extra = divmod(total, parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+class HTMLAnalyzer:
+    """Class to manage HTML analysis and save results."""
+
+    def __init__(
+        self,
+        chat_xai: ChatXAI,
+        prompt_template: PromptTemplate,
+        max_length: int,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[EmbeddingCache] = None,
+        batch_prompt_template: Optional[PromptTemplate] = None,
+        context_window: int = 131072,
+        reserved_tokens: int = 4096,
+    ):
+        self.chain = RunnableSequence(prompt_template, chat_xai)
+        self.batch_chain = None
+        if batch_prompt_template is not None:
+            self.batch_chain = RunnableSequence(batch_prompt_template, chat_xai)
+        self.max_length = max_length
+        # Tokens available for the document once the instructions and the answer are
+        # accounted for.
+        self.document_token_budget = context_window - reserved_tokens
+        self.model_name = getattr(chat_xai, "model_name", "")
+        self.template = prompt_template.template
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        # Semantic matches are only valid for the same model and prompt; key on those alone.
+        self.cache_namespace = LLMCache.make_key(self.model_name, self.template, max_length, "")
+        # Analyses in progress by cache key, so identical documents arriving together are
+        # sent to the model (and billed) once.
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def analyze_text_async(self, text: str) -> dict:
+        """
+        Analyze a document, awaiting the model instead of blocking a thread.
+
+        A call for a document identical to one already being analyzed waits for that
+        analysis instead of sending a second request.
+        """
+        key = await asyncio.to_thread(self._cache_key, text)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._track(key, self._analyze_uncached(key, text))
+        else:
+            logger.info("Waiting for the analysis of an identical input already in progress.")
+        # Shielded so that one cancelled caller does not cancel the analysis for the others.
+        return await asyncio.shield(task)
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Count tokens locally; an approximation when the model has no tiktoken encoding.
+
+        Without a tokenizer the UTF-8 byte length is returned, which never undercounts.
+        """
+        encoding = get_encoding(self.model_name)
+        if encoding is None:
+            return len(text.encode("utf-8"))
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def fit_to_context(self, text: str) -> str:
+        """Truncate text to the document token budget so the request cannot overflow the context."""
+        # Every token spans at least one byte, so short texts need no tokenization.
+        data = text.encode("utf-8")
+        if len(data) <= self.document_token_budget:
+            return text
+        encoding = get_encoding(self.model_name)
+        if encoding is None:
+            logger.warning(
+                f"Document has {len(data)} bytes; truncating to {self.document_token_budget} "
+                "bytes to fit the model context."
+            )
+            return data[:self.document_token_budget].decode("utf-8", errors="ignore")
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= self.document_token_budget:
+            return text
+        logger.warning(
+            f"Document has {len(tokens)} tokens; truncating to {self.document_token_budget} "
+            "to fit the model context."
+        )
+        return encoding.decode(tokens[:self.document_token_budget])
+
+    async def analyze_batch_async(self, texts: List[str]) -> List[dict]:
+        """
+        Analyze several documents, sending all uncached ones to the model in a single request.
+
+        Falls back to one request per document if the model's answer cannot be matched
+        to the documents. Results produced by the batch prompt have ``"batched"`` set.
+
+        Args:
+            texts (List[str]): Extracted document texts.
+
+        Returns:
+            List[dict]: One analysis result per text, in order.
+        """
+        keys = await asyncio.to_thread(lambda: [self._cache_key(text) for text in texts])
+        tasks = [self._in_flight.get(key) for key in keys]
+        fresh = {}
+        for i, key in enumerate(keys):
+            if tasks[i] is None:
+                fresh.setdefault(key, i)
+        if len(fresh) < len(keys):
+            logger.info("Waiting for the analysis of identical inputs already in progress.")
+        if fresh:
+            batch = asyncio.ensure_future(
+                self._analyze_batch_uncached(list(fresh), [texts[i] for i in fresh.values()])
+            )
+            for position, key in enumerate(fresh):
+                self._track(key, self._batch_item(batch, position))
+            tasks = [self._in_flight[key] for key in keys]
+        return list(await asyncio.gather(*(asyncio.shield(task) for task in tasks)))
+
+    def _track(self, key: str, coro) -> asyncio.Task:
+        """Run coro as the in-flight analysis for key until it finishes."""
+        task = asyncio.ensure_future(coro)
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return task
+
+    @staticmethod
+    async def _batch_item(batch: asyncio.Task, position: int) -> dict:
+        return (await asyncio.shield(batch))[position]
+
+    async def _analyze_uncached(self, key: str, text: str) -> dict:
+        cached, vector = await asyncio.to_thread(self._lookup_cache, text, key)
+        if cached is not None:
+            return cached
+        result = await self._ainvoke(text)
+        await asyncio.to_thread(self._store_cache, key, vector, result, len(text))
+        return result
+
+    async def _analyze_batch_uncached(self, keys: List[str], texts: List[str]) -> List[dict]:
+        lookups = await asyncio.to_thread(
+            lambda: [self._lookup_cache(text, key) for text, key in zip(texts, keys)]
+        )
+        missing = [i for i, (cached, _) in enumerate(lookups) if cached is None]
+        results = [cached for cached, _ in lookups]
+        if missing:
+            fresh = await self._ainvoke_batch([texts[i] for i in missing])
+            for i, result in zip(missing, fresh):
+                await asyncio.to_thread(
+                    self._store_cache, keys[i], lookups[i][1], result, len(texts[i])
+                )
+                results[i] = result
+        return results
+
+    def _cache_key(self, text: str) -> str:
+        return LLMCache.make_key(self.model_name, self.template, self.max_length, text)
+
+    def _lookup_cache(self, text: str, key: str) -> tuple:
+        """Return (cached result or None, embedding) for text with the given cache key."""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.info("Using cached analysis for identical input.")
+                return cached, None
+
+        vector = None
+        if self.semantic_cache is not None:
+            vector = self.semantic_cache.embed(text)
+            cached = self.semantic_cache.lookup(vector, self.cache_namespace, len(text))
+            if cached is not None:
+                logger.info("Using cached analysis for a near-duplicate input.")
+                if self.cache is not None:
+                    self.cache.set(key, cached)
+                return cached, vector
+
+        return None, vector
+
+    def _store_cache(self, key: str, vector, result: dict, length: int):
+        if self.cache is not None:
+            self.cache.set(key, result)
+        if vector is not None:
+            self.semantic_cache.add(vector, self.cache_namespace, result, length)
+
+    async def _ainvoke(self, text: str) -> dict:
+        logger.info("Analyzing text using the Grok AI model.")
+        try:
+            # Tokenizing a large document is CPU work; keep it off the event loop.
+            document = await asyncio.to_thread(self.fit_to_context, text)
+            with get_openai_callback() as cb:
+                summary = await self.chain.ainvoke({"document": document})
+                return self._build_result(summary, cb)
+        except Exception as e:
+            logger.error(f"Error analyzing text: {e}")
+            raise
+
+    async def _ainvoke_batch(self, texts: List[str]) -> List[dict]:
+        if len(texts) == 1:
+            return [await self._ainvoke(texts[0])]
+        if self.batch_chain is None:
+            raise ValueError("Batch analysis requires a batch prompt template.")
+        logger.info(f"Analyzing {len(texts)} documents in a single request.")
+        try:
+            with get_openai_callback() as cb:
+                response = await self.batch_chain.ainvoke(self._batch_input(texts))
+                results = self._build_batch_results(response, cb, len(texts))
+        except Exception as e:
+            logger.error(f"Error analyzing batch: {e}")
+            raise
+        if results is None:
+            logger.warning("Unusable batch response; analyzing the documents one by one.")
+            return list(await asyncio.gather(*(self._ainvoke(text) for text in texts)))
+        return results
+
+    @staticmethod
+    def _batch_input(texts: List[str]) -> dict:
+        documents = "\n\n".join(
+            f"Document {number}:\n{text}" for number, text in enumerate(texts, start=1)
+        )
+        return {"count": len(texts), "documents": documents}
+
+    def _build_batch_results(self, response, cb, count: int) -> Optional[List[dict]]:
+        """Split a batch response into per-document results, or None if it does not parse."""
+        content = getattr(response, "content", str(response))
+        # Tolerate prose or code fences around the array.
+        start, end = content.find("["), content.rfind("]")
+        if start == -1 or end < start:
+            return None
+        try:
+            summaries = orjson.loads(content[start:end + 1])
+        except orjson.JSONDecodeError:
+            return None
+        if (
+            not isinstance(summaries, list)
+            or len(summaries) != count
+            or not all(isinstance(summary, str) for summary in summaries)
+        ):
+            return None
+
+        # Usage is only reported for the whole request, so it is shared evenly.
+        input_shares = _split_evenly(cb.prompt_tokens, count)
+        output_shares = _split_evenly(cb.completion_tokens, count)
+        return [
+            {
+                "summary": self._truncate(summary),
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                # Tells callers the summary came from the batch prompt.
+                "batched": True,
+            }
+            for summary, input_tokens, output_tokens in zip(summaries, input_shares, output_shares)
+        ]
+
+    def _build_result(self, summary, cb) -> dict:
+        return {
+            "summary": self._truncate(getattr(summary, "content", str(summary))),
+            "input_tokens": cb.prompt_tokens,
+            "output_tokens": cb.completion_tokens,
+        }
+
+    def _truncate(self, summary_text: str) -> str:
+        # Truncate if necessary
+        if len(summary_text) > self.max_length:
+            summary_text = summary_text[:self.max_length]
+            logger.warning("Summary truncated due to length limit.")
+        return summary_text
+
+    @staticmethod
+    def save_to_json(data: dict, output_path: Path):
+        logger.info(f"Saving analysis results to {output_path}")
+        try:
+            output_path.write_bytes(
+                orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            )
+        except Exception as e:
+            logger.error(f"Error saving JSON file: {e}")
+            raise
@@ -0,0 +1,4 @@
+from .llm_cache import LLMCache
+from .semantic_cache import EmbeddingCache
+
+__all__ = ["EmbeddingCache", "LLMCache"]
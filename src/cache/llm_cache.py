@@ -0,0 +1,62 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCache:
+    """On-disk exact-match cache for model responses, one JSON file per entry."""
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(model: str, template: str, max_length: int, text: str) -> str:
+        """
+        Build a cache key from everything that determines the model's answer.
+
+        Args:
+            model (str): Name of the model queried.
+            template (str): Prompt template the document is inserted into.
+            max_length (int): Maximum summary length passed to the template.
+            text (str): Extracted document text.
+
+        Returns:
+            str: Hex SHA-256 digest identifying the request.
+        """
+        payload = json.dumps(
+            {"model": model, "template": template, "max_length": max_length, "text": text},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached result for key, or None on a miss or unreadable entry."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def set(self, key: str, value: dict):
+        """Store value under key, replacing the file atomically so readers never see partial writes."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(value, file, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
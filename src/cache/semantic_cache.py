@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see the "semantic" extra
+    np = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Words per embedded chunk; kept under the 256-wordpiece input limit of MiniLM-style models,
+# which otherwise silently truncate and see nothing past the opening boilerplate.
+CHUNK_WORDS = 180
+
+# Upper bound on chunks embedded per document; longer documents are sampled evenly.
+MAX_CHUNKS = 64
+
+
+class EmbeddingCache:
+    """
+    Similarity cache that reuses a stored result when a new document embeds close to a cached one.
+
+    A document is embedded as the mean of its chunk embeddings, so content throughout the
+    text counts rather than only the model's first 256 wordpieces. A match must also have a
+    similar length, which keeps documents sharing boilerplate and outline but differing in
+    body apart. Embeddings are L2-normalised, so cosine similarity is a single matrix-vector
+    product. Vectors are persisted in ``vectors.npz`` and the matching results in
+    ``entries.json``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        sim_threshold: float = 0.92,
+        model_name: str = DEFAULT_EMBEDDING_MODEL,
+        length_tolerance: float = 0.1,
+    ):
+        if np is None:
+            raise ImportError("EmbeddingCache requires numpy: pip install 'baker[semantic]'")
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "EmbeddingCache requires sentence-transformers: pip install 'baker[semantic]'"
+            ) from e
+
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.sim_threshold = sim_threshold
+        self.length_tolerance = length_tolerance
+        self.model = SentenceTransformer(model_name)
+        self._lock = threading.Lock()
+        self._vectors, self._entries = self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.cache_dir / "vectors.npz"
+
+    @property
+    def _entries_path(self) -> Path:
+        return self.cache_dir / "entries.json"
+
+    def _load(self):
+        dim = self.model.get_sentence_embedding_dimension()
+        empty = np.empty((0, dim), dtype=np.float32)
+        if not (self._vectors_path.exists() and self._entries_path.exists()):
+            return empty, []
+        try:
+            with np.load(self._vectors_path) as data:
+                vectors = data["vectors"]
+            with open(self._entries_path, "r", encoding="utf-8") as file:
+                entries = json.load(file)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable semantic cache in {self.cache_dir}: {e}")
+            return empty, []
+        if len(vectors) != len(entries) or vectors.shape[1] != dim:
+            logger.warning(f"Ignoring inconsistent semantic cache in {self.cache_dir}.")
+            return empty, []
+        return vectors, entries
+
+    def embed(self, text: str):
+        """Return the normalised mean of the embeddings of text's chunks."""
+        words = text.split()
+        chunks = [
+            " ".join(words[start:start + CHUNK_WORDS])
+            for start in range(0, len(words), CHUNK_WORDS)
+        ] or [""]
+        if len(chunks) > MAX_CHUNKS:
+            step = len(chunks) / MAX_CHUNKS
+            chunks = [chunks[int(i * step)] for i in range(MAX_CHUNKS)]
+        vectors = self.model.encode(chunks, normalize_embeddings=True)
+        mean = vectors.mean(axis=0)
+        norm = np.linalg.norm(mean)
+        if norm > 0:
+            mean = mean / norm
+        return mean.astype(np.float32)
+
+    def lookup(self, vector, namespace: str, length: int) -> Optional[dict]:
+        """
+        Find the most similar cached result recorded under the same namespace.
+
+        Args:
+            vector: Normalised embedding returned by ``embed``.
+            namespace (str): Identifies the model and prompt the results were produced with.
+            length (int): Length of the document's text; candidates must be within
+                ``length_tolerance`` of it.
+
+        Returns:
+            Optional[dict]: The cached result if its similarity reaches the threshold, else None.
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+            scores = self._vectors @ vector
+            mask = np.fromiter(
+                (
+                    entry["namespace"] == namespace
+                    and self._similar_length(entry.get("length"), length)
+                    for entry in self._entries
+                ),
+                dtype=bool,
+                count=len(self._entries),
+            )
+            scores[~mask] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < self.sim_threshold:
+                return None
+            logger.info(f"Semantic cache hit with similarity {scores[best]:.3f}.")
+            return self._entries[best]["result"]
+
+    def _similar_length(self, cached_length: Optional[int], length: int) -> bool:
+        if cached_length is None:
+            return False
+        return abs(cached_length - length) <= self.length_tolerance * max(cached_length, length)
+
+    def add(self, vector, namespace: str, result: dict, length: int):
+        """Record result for the document of the given text length embedded as vector."""
+        with self._lock:
+            self._vectors = np.vstack([self._vectors, vector[np.newaxis, :]])
+            self._entries.append({"namespace": namespace, "length": length, "result": result})
+
+    def save(self):
+        """Persist the cache, replacing both files atomically."""
+        with self._lock:
+            vectors, entries = self._vectors, list(self._entries)
+        self._atomic_write(self._vectors_path, lambda f: np.savez(f, vectors=vectors), "wb")
+        self._atomic_write(
+            self._entries_path,
+            lambda f: json.dump(entries, f, ensure_ascii=False),
+            "w",
+        )
+
+    def _atomic_write(self, path: Path, write, mode: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            encoding = None if "b" in mode else "utf-8"
+            with os.fdopen(fd, mode, encoding=encoding) as file:
+                write(file)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
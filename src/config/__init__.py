@@ -0,0 +1,4 @@
+from .app_config import AppConfig
+from .config_loader import Config
+
+__all__ = ["AppConfig", "Config"]
@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """
+    Immutable, flattened view of the settings the application reads.
+
+    Built once from the nested YAML mapping so hot paths use attribute access instead
+    of repeated dictionary lookups, and a misspelt setting fails immediately.
+    """
+
+    # Declared by hand because dataclass(slots=True) needs Python 3.10; fields must
+    # therefore not have class-level defaults, which live in from_dict instead.
+    __slots__ = (
+        "input_dir",
+        "output_dir",
+        "log_file",
+        "log_level",
+        "xai_api_key",
+        "xai_model",
+        "context_window",
+        "reserved_tokens",
+        "max_length",
+        "strip_noise",
+        "concurrency",
+        "cache_enabled",
+        "semantic_cache_enabled",
+        "semantic_cache_model",
+        "semantic_cache_threshold",
+        "batching_enabled",
+        "batch_max_documents",
+        "batch_max_input_tokens",
+    )
+
+    input_dir: Path
+    output_dir: Path
+    log_file: str
+    log_level: str
+    xai_api_key: str
+    xai_model: str
+    context_window: int
+    reserved_tokens: int
+    max_length: int
+    strip_noise: bool
+    concurrency: int
+    cache_enabled: bool
+    semantic_cache_enabled: bool
+    semantic_cache_model: str
+    semantic_cache_threshold: float
+    batching_enabled: bool
+    batch_max_documents: int
+    batch_max_input_tokens: int
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "AppConfig":
+        """
+        Build an AppConfig from the mapping loaded by Config.
+
+        Args:
+            config (dict): Parsed configuration with environment variables resolved.
+
+        Returns:
+            AppConfig: The settings, with defaults filled in for optional sections.
+        """
+        logging_config = config.get("logging", {})
+        xai_config = config["xai"]
+        cache_config = config.get("cache", {})
+        semantic_config = cache_config.get("semantic", {})
+        batching_config = config.get("batching", {})
+        context_window = xai_config.get("context_window", 131072)
+        reserved_tokens = xai_config.get("reserved_tokens", 4096)
+        return cls(
+            input_dir=Path(config["directories"]["input"]),
+            output_dir=Path(config["directories"]["output"]),
+            log_file=logging_config.get("log_file", "app.log"),
+            log_level=logging_config.get("log_level", "INFO"),
+            xai_api_key=xai_config["api_key"],
+            xai_model=xai_config["model"],
+            context_window=context_window,
+            reserved_tokens=reserved_tokens,
+            max_length=config.get("summary", {}).get("max_length", 2500),
+            strip_noise=config.get("extraction", {}).get("strip_noise", False),
+            concurrency=config.get("processing", {}).get("concurrency", 8),
+            cache_enabled=cache_config.get("enabled", False),
+            semantic_cache_enabled=semantic_config.get("enabled", False),
+            semantic_cache_model=semantic_config.get(
+                "model", "sentence-transformers/all-MiniLM-L6-v2"
+            ),
+            semantic_cache_threshold=semantic_config.get("sim_threshold", 0.92),
+            batching_enabled=batching_config.get("enabled", False),
+            batch_max_documents=batching_config.get("max_documents", 8),
+            # Batched documents are not truncated, so the budget must fit the context.
+            batch_max_input_tokens=min(
+                batching_config.get("max_input_tokens", 32000), context_window - reserved_tokens
+            ),
+        )
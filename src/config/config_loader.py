@@ -0,0 +1,75 @@
+import copy
+import os
+import re
+
+import yaml
+
+# libyaml's C loader when PyYAML was built with it, otherwise the pure-Python one.
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# A "${VAR}" placeholder anywhere in a string value.
+_ENV_PATTERN = re.compile(r"\$\{([^}]+)\}")
+
+
+class Config:
+    """Class to load and maintain configuration settings."""
+
+    # Parsed (unresolved) configurations and whether they contain placeholders, keyed on
+    # (absolute path, modification time).
+    _cache = {}
+
+    def __init__(self, config_path: str = "config.yaml"):
+        self.config_path = config_path
+        self.config = self.load_config()
+
+    def load_config(self) -> dict:
+        """Loads configuration from a YAML file and resolves environment variables."""
+        try:
+            mtime = os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {self.config_path}") from None
+        cache_key = (os.path.abspath(self.config_path), mtime)
+        if cache_key not in Config._cache:
+            with open(self.config_path, "r", encoding="utf-8") as file:
+                raw = file.read()
+            Config._cache[cache_key] = (yaml.load(raw, Loader=YAMLLoader), "${" in raw)
+        parsed, has_placeholders = Config._cache[cache_key]
+        # Callers may mutate their copy; keep the cached one pristine.
+        config = copy.deepcopy(parsed)
+        # Placeholders are resolved on every load so environment changes are always seen;
+        # the tree is only walked when the file actually contains any.
+        if has_placeholders:
+            config = self.resolve_env_variables(config)
+        return config
+
+    def resolve_env_variables(self, config: dict) -> dict:
+        """
+        Resolve environment variable placeholders in the configuration.
+
+        Placeholders may make up a whole value ("${VAR}") or be embedded in one
+        ("postgres://${USER}@host"). The configuration is updated in place.
+        """
+        if isinstance(config, str):
+            return _ENV_PATTERN.sub(_env_value, config)
+        if not isinstance(config, (dict, list)):
+            return config
+
+        stack = [config]
+        while stack:
+            container = stack.pop()
+            items = container.items() if isinstance(container, dict) else enumerate(container)
+            for key, value in items:
+                if isinstance(value, str):
+                    if "${" in value:
+                        container[key] = _ENV_PATTERN.sub(_env_value, value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        return config
+
+
+def _env_value(match: re.Match) -> str:
+    env_var = match.group(1)
+    env_value = os.getenv(env_var)
+    if not env_value:
+        raise EnvironmentError(f"Environment variable '{env_var}' is not set.")
+    return env_value
@@ -0,0 +1,3 @@
+from .html_extractor import HTMLExtractor
+
+__all__ = ["HTMLExtractor"]
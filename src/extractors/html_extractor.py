@@ -0,0 +1,121 @@
+import logging
+from functools import partial
+from pathlib import Path
+
+from lxml import etree
+from selectolax.lexbor import LexborHTMLParser
+
+logger = logging.getLogger(__name__)
+
+# Files at least this large are stream-parsed so the whole DOM is never held in memory.
+STREAMING_THRESHOLD_BYTES = 10 * 1024 * 1024
+
+# Bytes fed to the streaming parser at a time.
+STREAMING_CHUNK_BYTES = 1024 * 1024
+
+# Elements whose contents are code or styling rather than readable text.
+NOISE_TAGS = ("script", "style", "noscript")
+
+
+class HTMLExtractor:
+    """Class to extract text from HTML files."""
+
+    @staticmethod
+    def extract_text(html_path: Path, strip_noise: bool = False) -> str:
+        """
+        Extract the text of the document body.
+
+        Args:
+            html_path (Path): HTML file to read.
+            strip_noise (bool): Drop the contents of <script>, <style> and <noscript>.
+        """
+        logger.info(f"Extracting text from HTML file: {html_path}")
+        try:
+            if html_path.stat().st_size >= STREAMING_THRESHOLD_BYTES:
+                try:
+                    return HTMLExtractor.stream_text(html_path, strip_noise)
+                except ValueError as e:
+                    logger.warning(f"{e}; extracting in memory instead.")
+            return HTMLExtractor._lexbor_text(html_path.read_bytes(), strip_noise)
+        except Exception as e:
+            logger.error(f"Error extracting text from {html_path}: {e}")
+            raise
+
+    @staticmethod
+    def _lexbor_text(data: bytes, strip_noise: bool) -> str:
+        tree = LexborHTMLParser(data)
+        if strip_noise:
+            tree.strip_tags(list(NOISE_TAGS))
+        # Frameset documents have no body; their text (e.g. <noframes>) is under the root.
+        root = tree.body if tree.body is not None else tree.root
+        return root.text(separator="\n").strip()
+
+    @staticmethod
+    def stream_text(html_path: Path, strip_noise: bool = False) -> str:
+        """
+        Extract the body text incrementally, discarding every element once it has been read.
+
+        Produces the same output as the in-memory path. The file is fed to a pull parser in
+        chunks and text is collected from start and end events at every depth; each element
+        is cleared after its end event along with its already-read preceding siblings, so
+        memory stays bounded however deeply the content is nested.
+
+        Raises:
+            ValueError: If the parser stopped before the end of the document (libxml2 gives
+                up on nesting deeper than its limit), so the text would be incomplete, or if
+                the document has no body (a frameset), which only the in-memory path handles.
+        """
+        chunks = []
+        # For each open element: whether text directly inside it belongs in the output.
+        keep_stack = []
+        found_body = False
+
+        def flush(parent, keep: bool, before=None):
+            # Emit the parent's text and the tails of its children preceding `before` (all
+            # complete once the parser has reached `before`), then drop those children.
+            if keep:
+                chunks.append(parent.text)
+            parent.text = None
+            while len(parent) and parent[0] is not before:
+                if keep:
+                    chunks.append(parent[0].tail)
+                del parent[0]
+
+        def handle(events):
+            nonlocal found_body
+            for event, elem in events:
+                if event == "start":
+                    parent = elem.getparent()
+                    parent_keep = keep_stack[-1] if keep_stack else False
+                    if parent is not None:
+                        flush(parent, parent_keep, before=elem)
+                    if elem.tag == "body":
+                        found_body = True
+                    keep = parent_keep or elem.tag == "body"
+                    if strip_noise and elem.tag in NOISE_TAGS:
+                        keep = False
+                    keep_stack.append(keep)
+                else:
+                    flush(elem, keep_stack.pop())
+                    # The tail still belongs to the parent and is read at the next flush.
+                    elem.clear(keep_tail=True)
+
+        # Unlike iterparse, the pull parser honours huge_tree for HTML, which lifts the
+        # nesting limit from 256 to 2048.
+        parser = etree.HTMLPullParser(events=("start", "end"), encoding="utf-8", huge_tree=True)
+        with open(html_path, "rb") as file:
+            for block in iter(partial(file.read, STREAMING_CHUNK_BYTES), b""):
+                parser.feed(block)
+                handle(parser.read_events())
+        parser.close()
+        handle(parser.read_events())
+
+        # libxml2 closes every open element at the end of a complete parse. Elements left
+        # open, or a fatal error, mean it stopped early, sometimes without logging anything.
+        fatal = [error for error in parser.error_log if error.level == etree.ErrorLevels.FATAL]
+        if keep_stack or fatal:
+            reason = fatal[0].message if fatal else "document nested too deeply"
+            raise ValueError(f"Streaming parse of {html_path} stopped early: {reason}")
+        if not found_body:
+            raise ValueError(f"{html_path} has no body to stream")
+        return "\n".join(chunk for chunk in chunks if chunk).strip()
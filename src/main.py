@@ -1,123 +1,104 @@
-import json
+import asyncio
+import atexit
 import logging
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import List, Optional
 
-from bs4 import BeautifulSoup
-import yaml
-from langchain.prompts import PromptTemplate
-from langchain_community.callbacks.manager import get_openai_callback
-from langchain_core.runnables import RunnableSequence
+from dotenv import load_dotenv
 from langchain_xai import ChatXAI
 
-from prompts import get_summary_prompt
+from analyzers import HTMLAnalyzer
+from cache import EmbeddingCache, LLMCache
+from config import AppConfig, Config
+from extractors import HTMLExtractor
+from prompts import get_batch_summary_prompt, get_summary_prompt
+
+# Replaced by setup_logging() when run as a script.
+logger = logging.getLogger(__name__)
 
 # =========================
-# Configuration and Logging Setup
+# Logging Setup
 # =========================
 
-class Config:
-    """Class to load and maintain configuration settings."""
-
-    def __init__(self, config_path: str = "config.yaml"):
-        self.config_path = config_path
-        self.config = self.load_config()
-
-    def load_config(self) -> dict:
-        """Loads configuration from a YAML file and resolves environment variables."""
-        if not os.path.exists(self.config_path):
-            raise FileNotFoundError(f"Configuration file not found: {self.config_path}")
-        with open(self.config_path, "r", encoding="utf-8") as file:
-            config = yaml.safe_load(file)
-        return self.resolve_env_variables(config)
-
-    def resolve_env_variables(self, config: dict) -> dict:
-        """Resolve environment variable placeholders in the configuration."""
-        if isinstance(config, dict):
-            return {key: self.resolve_env_variables(value) for key, value in config.items()}
-        elif isinstance(config, list):
-            return [self.resolve_env_variables(item) for item in config]
-        elif (
-            isinstance(config, str) and config.startswith("${") and config.endswith("}")
-        ):
-            env_var = config[2:-1]
-            env_value = os.getenv(env_var)
-            if not env_value:
-                raise EnvironmentError(f"Environment variable '{env_var}' is not set.")
-            return env_value
-        return config
+class BufferedFileHandler(logging.FileHandler):
+    """
+    File handler that writes through a large buffer instead of flushing every record.
 
+    Records at ERROR and above are still flushed straight away; everything else reaches
+    the file when the buffer fills or the handler is closed.
+    """
 
-def setup_logging(log_file: str, log_level: str):
-    """Set up logging."""
-    numeric_level = getattr(logging, log_level.upper(), None)
-    if not isinstance(numeric_level, int):
-        numeric_level = logging.INFO
-    logging.basicConfig(
-        level=numeric_level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler()],
-    )
-    return logging.getLogger(__name__)
+    def __init__(self, filename: str, buffer_size: int = 64 * 1024, **kwargs):
+        self.buffer_size = buffer_size
+        super().__init__(filename, **kwargs)
 
+    def _open(self):
+        return open(
+            self.baseFilename,
+            self.mode,
+            buffering=self.buffer_size,
+            encoding=self.encoding,
+            errors=self.errors,
+        )
 
-# =========================
-# HTML Processing Classes
-# =========================
+    def flush(self):
+        # StreamHandler.emit() flushes after every record; leave that to the buffer.
+        pass
 
-class HTMLExtractor:
-    """Class to extract text from HTML files."""
+    def emit(self, record: logging.LogRecord):
+        super().emit(record)
+        if record.levelno >= logging.ERROR and self.stream is not None:
+            with self.lock:
+                self.stream.flush()
 
-    @staticmethod
-    def extract_text(html_path: Path) -> str:
-        logger.info(f"Extracting text from HTML file: {html_path}")
-        try:
-            with open(html_path, "r", encoding="utf-8") as file:
-                soup = BeautifulSoup(file, "html.parser")
-                return soup.get_text(separator="\n").strip()
-        except Exception as e:
-            logger.error(f"Error extracting text from {html_path}: {e}")
-            raise
 
+# Queue feeding the background log listener; set by setup_logging().
+_log_queue = None
 
-class HTMLAnalyzer:
-    """Class to manage HTML analysis and save results."""
 
-    def __init__(self, chat_xai: ChatXAI, prompt_template: PromptTemplate, max_length: int):
-        self.chain = RunnableSequence(prompt_template, chat_xai)
-        self.max_length = max_length
+def setup_logging(log_file: str, log_level: str):
+    """
+    Set up logging.
+
+    Records are only enqueued on the calling thread; a background QueueListener formats
+    them and writes them to the console and a buffered log file. A multiprocessing queue
+    is used so records from extraction worker processes reach the same listener.
+    """
+    global _log_queue
+    numeric_level = getattr(logging, log_level.upper(), None)
+    if not isinstance(numeric_level, int):
+        numeric_level = logging.INFO
 
-    def analyze_text(self, text: str) -> dict:
-        logger.info("Analyzing text using the Grok AI model.")
-        try:
-            with get_openai_callback() as cb:
-                summary = self.chain.invoke({"document": text})
-                summary_text = getattr(summary, "content", str(summary))
-
-                # Truncate if necessary
-                if len(summary_text) > self.max_length:
-                    summary_text = summary_text[:self.max_length]
-                    logger.warning("Summary truncated due to length limit.")
-
-                return {
-                    "summary": summary_text,
-                    "input_tokens": cb.prompt_tokens,
-                    "output_tokens": cb.completion_tokens,
-                }
-        except Exception as e:
-            logger.error(f"Error analyzing text: {e}")
-            raise
+    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+    file_handler = BufferedFileHandler(log_file, delay=True)
+    stream_handler = logging.StreamHandler()
+    for handler in (file_handler, stream_handler):
+        handler.setFormatter(formatter)
+
+    _log_queue = multiprocessing.Queue(-1)
+    listener = QueueListener(_log_queue, file_handler, stream_handler, respect_handler_level=True)
+    listener.start()
+    # Registered after logging's own shutdown hook, so it runs first and drains the queue.
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.setLevel(numeric_level)
+    root.addHandler(QueueHandler(_log_queue))
+    return logging.getLogger(__name__)
 
-    @staticmethod
-    def save_to_json(data: dict, output_path: Path):
-        logger.info(f"Saving analysis results to {output_path}")
-        try:
-            with open(output_path, "w", encoding="utf-8") as json_file:
-                json.dump(data, json_file, ensure_ascii=False, indent=4)
-        except Exception as e:
-            logger.error(f"Error saving JSON file: {e}")
-            raise
 
+def _init_worker(log_queue, log_level: int):
+    """Process-pool initializer: send worker log records to the parent's listener."""
+    root = logging.getLogger()
+    # Forked workers inherit the parent's handlers; spawned ones start without any.
+    if log_queue is not None and not root.handlers:
+        root.setLevel(log_level)
+        root.addHandler(QueueHandler(log_queue))
 
 # =========================
 # Main Processing Function
@@ -127,53 +108,230 @@ def load_configuration(config_path: str = "config.yaml") -> dict:
     return Config(config_path).config
 
 
-def main():
+class DocumentBatcher:
+    """
+    Group (path, text) pairs into batches that fit a token budget as they arrive.
+
+    Documents are kept in order. A document that alone exceeds max_tokens gets a batch
+    of its own, so it is sent with the single-document prompt. A batch is handed out as
+    soon as it is full, so no document is held longer than needed.
+    """
+
+    def __init__(self, max_tokens: int, max_documents: int):
+        self.max_tokens = max_tokens
+        self.max_documents = max_documents
+        self.current, self.current_tokens = [], 0
+
+    def add(self, document: tuple, tokens: int) -> List[List[tuple]]:
+        """Add a document of the given token count and return the batches completed by it."""
+        if tokens > self.max_tokens:
+            return [[document]]
+        ready = []
+        if self.current and self.current_tokens + tokens > self.max_tokens:
+            ready.extend(self.flush())
+        self.current.append(document)
+        self.current_tokens += tokens
+        if len(self.current) >= self.max_documents:
+            ready.extend(self.flush())
+        return ready
+
+    def flush(self) -> List[List[tuple]]:
+        """Return the partially filled batch, if any."""
+        ready = [self.current] if self.current else []
+        self.current, self.current_tokens = [], 0
+        return ready
+
+
+def load_app_config(config_path: str = "config.yaml") -> AppConfig:
+    """Load .env (unless BAKER_SKIP_DOTENV is set) and the YAML configuration."""
+    # Set BAKER_SKIP_DOTENV to rely on the real environment only (e.g. in tests).
+    if os.getenv("BAKER_SKIP_DOTENV") is None:
+        load_dotenv()
+    return AppConfig.from_dict(load_configuration(config_path))
+
+
+async def main(config: Optional[AppConfig] = None):
     logger.info("Starting the application.")
 
-    config = load_configuration()
-    max_length = config.get("summary", {}).get("max_length", 2500)
+    if config is None:
+        config = load_app_config()
+    max_length = config.max_length
 
-    input_dir = Path(config["directories"]["input"])
-    output_dir = Path(config["directories"]["output"])
+    input_dir = config.input_dir
+    output_dir = config.output_dir
     input_dir.mkdir(parents=True, exist_ok=True)
     output_dir.mkdir(parents=True, exist_ok=True)
     logger.info(f"Input directory: {input_dir}")
     logger.info(f"Output directory: {output_dir}")
 
     chat_xai = ChatXAI(
-        xai_api_key=config["xai"]["api_key"],
-        model=config["xai"]["model"],
+        xai_api_key=config.xai_api_key,
+        model=config.xai_model,
         temperature=0.7,
     )
     template = get_summary_prompt(max_length=max_length)
-    analyzer = HTMLAnalyzer(chat_xai, template, max_length)
+    cache = None
+    if config.cache_enabled:
+        cache = LLMCache(output_dir / ".cache")
+    semantic_cache = None
+    if config.semantic_cache_enabled:
+        semantic_cache = EmbeddingCache(
+            output_dir / ".cache" / "semantic",
+            sim_threshold=config.semantic_cache_threshold,
+            model_name=config.semantic_cache_model,
+        )
+    batch_template = None
+    if config.batching_enabled:
+        batch_template = get_batch_summary_prompt(max_length=max_length)
+    analyzer = HTMLAnalyzer(
+        chat_xai,
+        template,
+        max_length,
+        cache,
+        semantic_cache,
+        batch_template,
+        context_window=config.context_window,
+        reserved_tokens=config.reserved_tokens,
+    )
+    strip_noise = config.strip_noise
+
+    concurrency = config.concurrency
+
+    # List both directories once, in a stable order, and drop already processed
+    # files before any extraction work is scheduled.
+    with os.scandir(output_dir) as entries:
+        done = {
+            entry.name.removesuffix("_summary.json")
+            for entry in entries
+            if entry.name.endswith("_summary.json")
+        }
+    with os.scandir(input_dir) as entries:
+        html_files = sorted(
+            entry.path for entry in entries if entry.name.endswith(".html") and entry.is_file()
+        )
+    pending = []
+    for path_str in html_files:
+        html_path = Path(path_str)
+        if html_path.stem in done:
+            logger.info(f"Skipping {html_path.name}: Output file already exists.")
+            continue
+        pending.append(path_str)
+    if not pending:
+        logger.info("Application processing completed.")
+        return
+
+    # Replace placeholder in the prompt with actual value; the same for every file. Cached
+    # results may come from an earlier batched run, so the batch prompt is always needed.
+    formatted_prompt = template.template.replace("{max_length}", str(max_length))
+    formatted_batch_prompt = get_batch_summary_prompt(max_length=max_length).template.replace(
+        "{max_length}", str(max_length)
+    )
 
-    for html_path in input_dir.glob("*.html"):
+    # Parsing is CPU-bound and runs in worker processes; the xAI round-trips are
+    # IO-bound and are awaited on the event loop. The semaphore bounds how many
+    # files are in flight, which also caps how much extracted text is held at once.
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def save_result(path_str: str, analysis_result: dict):
+        html_path = Path(path_str)
+        # Record the prompt that actually produced the summary.
+        prompt = formatted_batch_prompt if analysis_result.get("batched") else formatted_prompt
+        result = {
+            "input_html": str(html_path),
+            "prompt": prompt,
+            "summary": analysis_result["summary"],
+            "input_tokens": analysis_result["input_tokens"],
+            "output_tokens": analysis_result["output_tokens"],
+        }
+        output_path = output_dir / f"{html_path.stem}_summary.json"
+        await asyncio.to_thread(analyzer.save_to_json, result, output_path)
+
+    async def extract(path_str: str, pool: ProcessPoolExecutor) -> str:
+        return await loop.run_in_executor(
+            pool, partial(HTMLExtractor.extract_text, Path(path_str), strip_noise)
+        )
+
+    async def process(path_str: str, pool: ProcessPoolExecutor):
+        async with semaphore:
+            try:
+                text = await extract(path_str, pool)
+                analysis_result = await analyzer.analyze_text_async(text)
+                await save_result(path_str, analysis_result)
+            except Exception as e:
+                logger.error(f"Failed to process {Path(path_str).name}: {e}")
+
+    async def extract_or_none(path_str: str, pool: ProcessPoolExecutor) -> Optional[str]:
         try:
-            output_path = output_dir / f"{html_path.stem}_summary.json"
-            if output_path.exists():
-                logger.info(f"Skipping {html_path.name}: Output file already exists.")
-                continue
-
-            text = HTMLExtractor.extract_text(html_path)
-            analysis_result = analyzer.analyze_text(text)
-
-            # Replace placeholder in the prompt with actual value
-            formatted_prompt = template.template.replace("{max_length}", str(max_length))
-            result = {
-                "input_html": str(html_path),
-                "prompt": formatted_prompt,
-                "summary": analysis_result["summary"],
-                "input_tokens": analysis_result["input_tokens"],
-                "output_tokens": analysis_result["output_tokens"],
-            }
-            analyzer.save_to_json(result, output_path)
+            return await extract(path_str, pool)
         except Exception as e:
-            logger.error(f"Failed to process {html_path.name}: {e}")
+            logger.error(f"Failed to process {Path(path_str).name}: {e}")
+            return None
+
+    async def process_batch(batch: List[tuple]):
+        names = ", ".join(Path(path_str).name for path_str, _ in batch)
+        async with semaphore:
+            try:
+                results = await analyzer.analyze_batch_async([text for _, text in batch])
+                for (path_str, _), analysis_result in zip(batch, results):
+                    await save_result(path_str, analysis_result)
+            except Exception as e:
+                logger.error(f"Failed to process {names}: {e}")
+
+    async def process_batches(pool: ProcessPoolExecutor):
+        # Files are extracted in input order while earlier batches are analyzed. Each
+        # extracted text holds a slot until its batch is saved, so at most enough text for
+        # `concurrency` full batches is in memory at once.
+        held = asyncio.Semaphore(concurrency * config.batch_max_documents)
+        extractions = asyncio.Queue()
+
+        async def schedule():
+            for path_str in pending:
+                await held.acquire()
+                extraction = asyncio.ensure_future(extract_or_none(path_str, pool))
+                await extractions.put((path_str, extraction))
+            await extractions.put(None)
+
+        async def run(batch: List[tuple]):
+            try:
+                await process_batch(batch)
+            finally:
+                for _ in batch:
+                    held.release()
+
+        batcher = DocumentBatcher(config.batch_max_input_tokens, config.batch_max_documents)
+        scheduler = asyncio.ensure_future(schedule())
+        tasks = []
+        while (item := await extractions.get()) is not None:
+            path_str, extraction = item
+            text = await extraction
+            if text is None:
+                held.release()
+                continue
+            tokens = await asyncio.to_thread(analyzer.count_tokens, text)
+            for batch in batcher.add((path_str, text), tokens):
+                tasks.append(asyncio.ensure_future(run(batch)))
+        tasks.extend(asyncio.ensure_future(run(batch)) for batch in batcher.flush())
+        await scheduler
+        await asyncio.gather(*tasks)
+
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count() or 1,
+        initializer=_init_worker,
+        initargs=(_log_queue, logging.getLogger().level),
+    ) as pool:
+        if batch_template is None:
+            await asyncio.gather(*(process(path_str, pool) for path_str in pending))
+        else:
+            await process_batches(pool)
+
+    if semantic_cache is not None:
+        semantic_cache.save()
 
     logger.info("Application processing completed.")
 
 
 if __name__ == "__main__":
-    logger = setup_logging(log_file="app.log", log_level="INFO")
-    main()
\ No newline at end of file
+    app_config = load_app_config()
+    logger = setup_logging(log_file=app_config.log_file, log_level=app_config.log_level)
+    asyncio.run(main(app_config))
@@ -1,9 +1,16 @@
+from functools import lru_cache
+
 from langchain.prompts import PromptTemplate
 
+@lru_cache(maxsize=32)
 def get_summary_prompt(max_length: int) -> PromptTemplate:
     """
     Generate a summary prompt template that ensures the summary does not exceed a specified length.
 
+    Templates are cached per max_length and shared between callers, so they must not be mutated.
+    max_length is bound through partial_variables, which keeps the template text itself identical
+    for every length.
+
     Args:
         max_length (int): Maximum length of the summary.
 
@@ -23,4 +30,35 @@ def get_summary_prompt(max_length: int) -> PromptTemplate:
         input_variables=["document"],
         template=template,
         partial_variables={"max_length": max_length}
-    )
\ No newline at end of file
+    )
+
+@lru_cache(maxsize=32)
+def get_batch_summary_prompt(max_length: int) -> PromptTemplate:
+    """
+    Generate a prompt template that summarizes several documents in a single request.
+
+    The model is asked to answer with a JSON array holding one summary per document, in order.
+    Cached per max_length like get_summary_prompt.
+
+    Args:
+        max_length (int): Maximum length of each summary.
+
+    Returns:
+        PromptTemplate: The prompt template for batch summarization.
+    """
+    template = (
+        "You are an advanced summarization model. You are given {count} numbered documents. "
+        "Provide a concise summary of each document. Each summary must not exceed {max_length} "
+        "characters, ensuring clarity and relevance. Avoid including unnecessary details or "
+        "repeating information. If necessary, focus only on the most critical points to adhere "
+        "to the character limit.\n\n"
+        "Respond with a JSON array of exactly {count} strings, the summary of each document in "
+        "the order the documents are given, and nothing else.\n\n"
+        "{documents}\n\n"
+        "JSON array of summaries:"
+    )
+    return PromptTemplate(
+        input_variables=["count", "documents"],
+        template=template,
+        partial_variables={"max_length": max_length}
+    )
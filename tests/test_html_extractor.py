@@ -0,0 +1,36 @@
+import pytest
+
+from extractors import HTMLExtractor
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "<p>before</p>" + "<span>x" * 300 + "<p>important</p>",
+        "<div>" * 300 + "deep" + "</div>" * 300,
+    ],
+)
+def test_stream_text_matches_extract_text_on_deep_nesting(tmp_path, body):
+    html_path = tmp_path / "deep.html"
+    html_path.write_text(f"<html><body>{body}</body></html>", encoding="utf-8")
+    assert HTMLExtractor.stream_text(html_path) == HTMLExtractor.extract_text(html_path)
+
+
+def test_stream_text_refuses_to_truncate(tmp_path):
+    html_path = tmp_path / "deeper.html"
+    html_path.write_text(
+        "<html><body>" + "<div>" * 3000 + "deep" + "</div>" * 3000 + "</body></html>",
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError):
+        HTMLExtractor.stream_text(html_path)
+
+
+def test_extract_text_handles_framesets(tmp_path):
+    html_path = tmp_path / "frames.html"
+    html_path.write_text(
+        "<html><head><title>T</title></head>"
+        "<frameset><frame src=a><noframes>Hello frames</noframes></frameset></html>",
+        encoding="utf-8",
+    )
+    assert HTMLExtractor.extract_text(html_path) == "T\nHello frames"